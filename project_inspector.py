@@ -4,12 +4,73 @@ Project Inspector - A tool to analyze project structure and provide insights.
 """
 
 import argparse
+import asyncio
+import functools
+import hashlib
+import io
 import os
+import re
+import stat
 import subprocess
 import sys
+import tempfile
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Optional
+from itertools import repeat
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+try:
+    import llm
+except ImportError:
+    # The llm CLI is often installed in its own environment (e.g. pipx);
+    # fall back to running it as a subprocess in that case.
+    llm = None
+
+# Cached results live here, keyed by a hash of the project's file metadata
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "project_inspector"
+)
+CACHE_TTL = 24 * 60 * 60  # seconds
+
+# In --incremental mode, fall back to a full analysis once more than this
+# fraction of files has changed since the last run
+DELTA_THRESHOLD = 0.2
+
+# Separator repomix writes before each file in --style plain output
+FILE_HEADER_RE = re.compile(r"^={16,}\nFile: (.+)\n={16,}\n", re.MULTILINE)
+
+# Heading repomix writes before the per-file section in --style plain output
+FILES_SECTION_RE = re.compile(r"^={16,}\nFiles\n={16,}$", re.MULTILINE)
+
+# Lines kept from every file when trimming the context sent to the LLM
+TRIM_HEAD_LINES = 20
+
+# Declarations kept past TRIM_HEAD_LINES when trimming
+SIGNATURE_RE = re.compile(r"^\s*(def |class |async def |function |export |interface |type |struct |impl )")
+
+# Projects with less file content than this get a stock summary instead
+# of an LLM call
+TRIVIAL_MAX_BYTES = 512
+
+# Markdown code fence some models wrap JSON in despite being asked not to
+JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+# Shape the LLM is constrained to via llm's --schema support
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "project_summary": {"type": "string"},
+        "recommendations": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["project_summary", "recommendations"]
+}
+
+ANALYSIS_PROMPT = 'Analyze this codebase and provide: 1) A project summary describing what the code does, 2) A list of recommendations for improvements. Return only raw JSON, no markdown.'
+STREAM_PROMPT = 'Analyze this codebase and provide: 1) A project summary describing what the code does, 2) A list of recommendations for improvements.'
+DELTA_PROMPT = 'Below is a previous analysis of this codebase, followed by only the files that have changed or been removed since. Update the analysis and provide: 1) A project summary describing what the code does, 2) A list of recommendations for improvements. Return only raw JSON, no markdown.'
 
 def parse_arguments() -> argparse.Namespace:
     """Parse command line arguments."""
@@ -19,8 +80,10 @@ def parse_arguments() -> argparse.Namespace:
     )
     
     parser.add_argument(
-        "directory", 
-        help="Path to the project directory to analyze"
+        "directories",
+        nargs="+",
+        metavar="directory",
+        help="Path to the project directory to analyze (several may be given)"
     )
     
     parser.add_argument(
@@ -35,7 +98,41 @@ def parse_arguments() -> argparse.Namespace:
         help="Enable verbose output"
     )
     
-    return parser.parse_args()
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached results and always re-run the analysis"
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only send files changed since the last run to the LLM"
+    )
+    
+    parser.add_argument(
+        "--no-trim",
+        action="store_true",
+        help="Send full file contents to the LLM instead of signatures and file heads"
+    )
+    
+    parser.add_argument(
+        "--processes",
+        action="store_true",
+        help="Inspect multiple directories in a process pool instead of threads"
+    )
+    
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write the LLM's analysis as it is generated (free text, not cached)"
+    )
+    
+    args = parser.parse_args()
+    if args.stream and (len(args.directories) > 1 or args.incremental):
+        parser.error("--stream takes a single directory and cannot be combined with --incremental")
+    
+    return args
 
 def check_directory(directory: str) -> bool:
     """
@@ -47,20 +144,423 @@ def check_directory(directory: str) -> bool:
     Returns:
         bool: True if directory exists, False otherwise
     """
-    if not os.path.exists(directory):
+    # One stat() answers both questions
+    try:
+        st = os.stat(directory)
+    except OSError:
         print(f"Error: Directory '{directory}' does not exist.", file=sys.stderr)
         return False
     
-    if not os.path.isdir(directory):
+    if not stat.S_ISDIR(st.st_mode):
         print(f"Error: '{directory}' is not a directory.", file=sys.stderr)
         return False
     
     return True
 
-def extract_context(directory: str, verbose: bool = False) -> Optional[str]:
+Fingerprint = Tuple[Tuple[str, int, int], ...]
+
+# Directories repomix never packs (VCS data, caches, dependencies,
+# virtualenvs); skipped when fingerprinting so they neither cost a stat
+# per file nor invalidate the cache
+FINGERPRINT_SKIP_DIRS = frozenset({
+    ".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv",
+    ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache"
+})
+
+def directory_fingerprint(directory: str, exclude: Tuple[str, ...] = ()) -> Fingerprint:
+    """
+    Describe the current state of a directory from file metadata alone.
+    
+    Collects the sorted (relative path, size, mtime) of every file in the
+    tree, so any edit, addition or removal changes the result without
+    having to read file contents. FINGERPRINT_SKIP_DIRS are not walked.
+    
+    Args:
+        directory: Path to the project directory
+        exclude: Paths of files to leave out, such as the report being
+            written into the project
+        
+    Returns:
+        tuple: Sorted (relative path, size, mtime_ns) entries
+    """
+    excluded = {os.path.relpath(path, directory) for path in exclude}
+    entries = []
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in FINGERPRINT_SKIP_DIRS:
+                            stack.append(entry.path)
+                        continue
+                    rel = os.path.relpath(entry.path, directory)
+                    if rel in excluded:
+                        continue
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    entries.append((rel, st.st_size, st.st_mtime_ns))
+        except OSError:
+            continue
+    entries.sort()
+    return tuple(entries)
+
+def cache_key(directory: str, fingerprint: Optional[Fingerprint] = None,
+              trim: bool = True) -> str:
+    """
+    Compute a cache key for the current state of a directory.
+    
+    Args:
+        directory: Path to the project directory
+        fingerprint: Result of directory_fingerprint(), if already known
+        trim: Whether the analysis is made from the trimmed context
+        
+    Returns:
+        str: SHA-256 hex digest of the path, its fingerprint and settings
+    """
+    if fingerprint is None:
+        fingerprint = directory_fingerprint(directory)
+    
+    digest = hashlib.sha256()
+    digest.update(os.path.abspath(directory).encode("utf-8"))
+    digest.update(json.dumps(fingerprint).encode("utf-8"))
+    if not trim:
+        # Analyses of the full context are cached separately
+        digest.update(b"\0no-trim")
+    return digest.hexdigest()
+
+def is_valid_analysis(analysis) -> bool:
+    """
+    Check that an analysis has the shape iter_report() expects.
+    
+    Args:
+        analysis: Decoded JSON, from the LLM or from a file in CACHE_DIR
+        
+    Returns:
+        bool: True for a dict with a str "project_summary" and a list of
+        str "recommendations"
+    """
+    if not isinstance(analysis, dict) or not isinstance(analysis.get("project_summary"), str):
+        return False
+    recommendations = analysis.get("recommendations")
+    return isinstance(recommendations, list) and all(isinstance(r, str) for r in recommendations)
+
+def load_cache(key: str) -> Optional[dict]:
+    """
+    Load a cached result if one exists and has not expired.
+    
+    Args:
+        key: Cache key from cache_key()
+        
+    Returns:
+        dict or None: Entry with "context" and "analysis", or None on a miss
+    """
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    # Expired entries, and malformed ones (including those from before the
+    # analysis was structured JSON), will never be used again
+    if (not isinstance(entry, dict)
+            or not isinstance(entry.get("ts"), (int, float))
+            or time.time() - entry["ts"] > CACHE_TTL
+            or not isinstance(entry.get("context"), str)
+            or not is_valid_analysis(entry.get("analysis"))):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        return None
+    
+    return entry
+
+def prune_cache() -> None:
+    """
+    Delete cached results (and stray temporary files) older than CACHE_TTL.
+    
+    --incremental manifests are kept, since they are only useful once a
+    project has not been analyzed for a while.
+    """
+    cutoff = time.time() - CACHE_TTL
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for entry in it:
+                if entry.name.startswith("manifest-") or not entry.is_file():
+                    continue
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+
+def write_json_atomic(path: str, data: dict) -> None:
+    """
+    Write JSON to a file under CACHE_DIR.
+    
+    The data is written to a temporary file and moved into place with
+    os.replace so concurrent readers never see a partial file. Failures
+    are reported but otherwise ignored; everything in the cache is
+    best-effort.
+    
+    Args:
+        path: Destination path
+        data: JSON-serializable data to write
+    """
+    temp_file = None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # A unique name per writer, so threads of one process never share it
+        fd, temp_file = tempfile.mkstemp(suffix=".tmp", dir=CACHE_DIR)
+        with open(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_file, path)
+    except OSError as e:
+        print(f"Warning: could not write cache entry: {e}", file=sys.stderr)
+        if temp_file:
+            try:
+                os.unlink(temp_file)
+            except OSError:
+                pass
+
+def save_cache(key: str, context: str, analysis: dict) -> None:
+    """
+    Store a result in the cache.
+    
+    Args:
+        key: Cache key from cache_key()
+        context: The extracted context
+        analysis: The analysis results
+    """
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    write_json_atomic(path, {"context": context, "analysis": analysis, "ts": time.time()})
+    prune_cache()
+
+def split_files(context: str) -> Dict[str, str]:
+    """
+    Split repomix plain-style output into per-file blocks.
+    
+    Args:
+        context: The extracted context
+        
+    Returns:
+        dict: File path -> block text (header included), in output order
+    """
+    blocks = {}
+    matches = list(FILE_HEADER_RE.finditer(context))
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(context)
+        blocks[match.group(1)] = context[match.start():end]
+    return blocks
+
+def _compress_block(block: str, out: TextIO) -> None:
+    """
+    Write a trimmed copy of one file block from split_files().
+    
+    Keeps the file header, the first TRIM_HEAD_LINES lines and any later
+    line that looks like a declaration, and notes how much was dropped.
+    
+    Args:
+        block: File block, header included
+        out: Where to write the trimmed block
+    """
+    header_end = FILE_HEADER_RE.match(block).end()
+    out.write(block[:header_end])
+    
+    omitted = 0
+    for i, line in enumerate(block[header_end:].splitlines(keepends=True)):
+        if i < TRIM_HEAD_LINES or SIGNATURE_RE.match(line):
+            out.write(line)
+        else:
+            omitted += 1
+    
+    if omitted:
+        out.write(f"# file has {omitted} more lines\n\n")
+
+def _compress_context(context: str) -> str:
+    """
+    Trim extracted context down to what the LLM needs for an overview.
+    
+    Text before the first file (repomix's summary and directory tree) is
+    kept as-is; every file is reduced by _compress_block(). This bounds
+    token cost on large repositories.
+    
+    Args:
+        context: The extracted context
+        
+    Returns:
+        str: The trimmed context
+    """
+    first = FILE_HEADER_RE.search(context)
+    if not first:
+        return context
+    
+    buf = io.StringIO()
+    buf.write(context[:first.start()])
+    for block in split_files(context).values():
+        _compress_block(block, buf)
+    return buf.getvalue()
+
+def trivial_analysis(context: str) -> Optional[dict]:
+    """
+    Produce a stock analysis for projects too small to be worth an LLM call.
+    
+    Args:
+        context: The extracted context
+        
+    Returns:
+        dict or None: Analysis if the project has under TRIVIAL_MAX_BYTES
+        of file content, otherwise None
+    """
+    blocks = split_files(context)
+    
+    # No file blocks only means an empty project if the output has the
+    # plain-style Files section; otherwise we could not parse it (e.g. a
+    # changed separator or a different repomix style)
+    if not blocks and not FILES_SECTION_RE.search(context):
+        return None
+    
+    n_files = len(blocks)
+    size = sum(len(block) for block in blocks.values())
+    
+    if size >= TRIVIAL_MAX_BYTES:
+        return None
+    
+    return {
+        "project_summary": f"Trivial project ({n_files} files, {size} bytes); skipped LLM analysis.",
+        "recommendations": []
+    }
+
+def manifest_path(directory: str) -> str:
+    """
+    Get the path of the --incremental manifest for a directory.
+    
+    Args:
+        directory: Path to the project directory
+        
+    Returns:
+        str: Path of the manifest file under CACHE_DIR
+    """
+    digest = hashlib.sha256(os.path.abspath(directory).encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"manifest-{digest}.json")
+
+def analyze_incremental(directory: str, context: str, verbose: bool = False,
+                        trim: bool = True) -> Optional[dict]:
+    """
+    Analyze the context, sending only what changed since the last run.
+    
+    Each file block is hashed and compared against the manifest saved by
+    the previous run. If at most DELTA_THRESHOLD of the files changed, the
+    LLM gets the previous analysis plus the changed files only; otherwise
+    the whole context is analyzed as usual.
+    
+    Args:
+        directory: Path to the project directory
+        context: The extracted context
+        verbose: Whether to show verbose output
+        trim: Whether to trim what is sent with _compress_context()
+        
+    Returns:
+        dict or None: Parsed analysis, or None if analysis failed
+    """
+    blocks = split_files(context)
+    hashes = {
+        path: hashlib.sha256(block.encode("utf-8")).hexdigest()
+        for path, block in blocks.items()
+    }
+    
+    path = manifest_path(directory)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        previous, prior_analysis = manifest["files"], manifest["analysis"]
+    except (OSError, ValueError, KeyError, TypeError):
+        previous, prior_analysis = None, None
+    
+    # A malformed manifest is as good as none
+    if not isinstance(previous, dict) or not is_valid_analysis(prior_analysis):
+        analysis = analyze_context(_compress_context(context) if trim else context, verbose)
+    else:
+        changed = [p for p, h in hashes.items() if previous.get(p) != h]
+        removed = [p for p in previous if p not in hashes]
+        unchanged = len(hashes) - len(changed)
+        overlap = unchanged / max(len(hashes), len(previous), 1)
+        
+        if verbose:
+            print(f"{len(changed)} changed, {len(removed)} removed, "
+                  f"{overlap:.0%} unchanged since last run")
+        
+        if not changed and not removed:
+            analysis = prior_analysis
+        elif overlap >= 1 - DELTA_THRESHOLD:
+            delta = io.StringIO()
+            delta.write(f"PREVIOUS ANALYSIS\n{json.dumps(prior_analysis)}\n\nCHANGED FILES\n")
+            for p in changed:
+                if trim:
+                    _compress_block(blocks[p], delta)
+                else:
+                    delta.write(blocks[p])
+            if removed:
+                delta.write("REMOVED FILES\n")
+                delta.writelines(f"- {p}\n" for p in removed)
+            analysis = analyze_context(delta.getvalue(), verbose, prompt=DELTA_PROMPT)
+        else:
+            analysis = analyze_context(_compress_context(context) if trim else context, verbose)
+    
+    if analysis:
+        write_json_atomic(path, {"files": hashes, "analysis": analysis})
+    return analysis
+
+class _ExtractionFailed(Exception):
+    """Raised inside _extract_cached() so failures are not memoized."""
+
+@functools.lru_cache(maxsize=16)
+def _extract_cached(fingerprint: Fingerprint, directory: str, verbose: bool) -> str:
+    context = run_repomix(directory, verbose)
+    if not context:
+        raise _ExtractionFailed(directory)
+    return context
+
+def extract_context(directory: str, verbose: bool = False,
+                    fingerprint: Optional[Fingerprint] = None) -> Optional[str]:
+    """
+    Extract code context, reusing earlier output for an unchanged directory.
+    
+    Results are memoized in-process on the directory fingerprint, so a
+    long-running caller re-inspecting the same tree only pays for a walk
+    of file metadata rather than another repomix run.
+    
+    Args:
+        directory: Path to the project directory
+        verbose: Whether to show verbose output
+        fingerprint: Result of directory_fingerprint(), if already known
+        
+    Returns:
+        str or None: Extracted context as text, or None if extraction failed
+    """
+    if fingerprint is None:
+        fingerprint = directory_fingerprint(directory)
+    
+    try:
+        return _extract_cached(fingerprint, os.path.abspath(directory), verbose)
+    except _ExtractionFailed:
+        return None
+
+def run_repomix(directory: str, verbose: bool = False) -> Optional[str]:
     """
     Extract code context using repomix.
     
+    The output is read straight from repomix's stdout rather than going
+    through a temporary file. Releases of repomix without --stdout fall
+    back to extract_context_via_file().
+    
     Args:
         directory: Path to the project directory
         verbose: Whether to show verbose output
@@ -68,7 +568,60 @@ def extract_context(directory: str, verbose: bool = False) -> Optional[str]:
     Returns:
         str or None: Extracted context as text, or None if extraction failed
     """
-    temp_file = "temp_output.md"
+    cmd = ["repomix", "--stdout", "--style", "plain", directory]
+    
+    if verbose:
+        print(f"Running: {' '.join(cmd)}")
+    
+    # Set environment variables for proper UTF-8 encoding
+    env = os.environ.copy()
+    env['PYTHONIOENCODING'] = 'utf-8'
+    env['PYTHONUTF8'] = '1'
+    
+    try:
+        # Capture raw bytes and decode once, at the point we hand it back.
+        # stderr stays piped here, even when not verbose, because it is the
+        # only way to tell a missing --stdout option from a real failure.
+        result = subprocess.run(
+            cmd,
+            check=True,  # Raise exception on non-zero exit
+            capture_output=True,
+            env=env
+        )
+        return result.stdout.decode('utf-8', 'replace')
+    except subprocess.CalledProcessError as e:
+        stderr = e.stderr.decode('utf-8', 'replace')
+        if "--stdout" in stderr:
+            if verbose:
+                print("repomix does not support --stdout, using a temporary file", file=sys.stderr)
+            return extract_context_via_file(directory, verbose)
+        print(f"Error running repomix: {e}", file=sys.stderr)
+        if verbose:
+            print(f"stderr: {stderr}", file=sys.stderr)
+        return None
+    except FileNotFoundError:
+        print("Error: 'repomix' command not found. Please install it first.", file=sys.stderr)
+        return None
+
+def extract_context_via_file(directory: str, verbose: bool = False) -> Optional[str]:
+    """
+    Extract code context using repomix, writing through a temporary file.
+    
+    Only used for repomix releases that cannot write to stdout.
+    
+    Args:
+        directory: Path to the project directory
+        verbose: Whether to show verbose output
+        
+    Returns:
+        str or None: Extracted context as text, or None if extraction failed
+    """
+    # Prefer RAM-backed tmpfs so the output never has to reach the disk;
+    # a unique name also keeps parallel runs from clobbering each other
+    shm = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', dir=shm, delete=False) as tf:
+        temp_file = tf.name
+    
     try:
         cmd = ["repomix", "-o", temp_file, "--style", "plain", directory]
         
@@ -84,30 +637,26 @@ def extract_context(directory: str, verbose: bool = False) -> Optional[str]:
         subprocess.run(
             cmd,
             check=True,  # Raise exception on non-zero exit
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            encoding='utf-8',
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE if verbose else subprocess.DEVNULL,
             env=env
         )
         
-        # Test that the output file was created successfully
-        if os.path.exists(temp_file):
-            # Read the content from the generated file
-            with open(temp_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # Clean up the temporary file
-            os.remove(temp_file)
-            
-            return content
-        else:
+        # Read the content from the generated file as bytes, decode once
+        try:
+            with open(temp_file, 'rb') as f:
+                content = f.read().decode('utf-8', 'replace')
+        except FileNotFoundError:
+            content = None
+        
+        if not content:
             print("Error: Output file was not created by repomix", file=sys.stderr)
             return None
+        return content
     except subprocess.CalledProcessError as e:
         print(f"Error running repomix: {e}", file=sys.stderr)
-        if verbose:
-            print(f"stderr: {e.stderr}", file=sys.stderr)
+        if e.stderr:
+            print(f"stderr: {e.stderr.decode('utf-8', 'replace')}", file=sys.stderr)
         return None
     except FileNotFoundError:
         print("Error: 'repomix' command not found. Please install it first.", file=sys.stderr)
@@ -116,134 +665,580 @@ def extract_context(directory: str, verbose: bool = False) -> Optional[str]:
         print(f"Error reading temporary file: {e}", file=sys.stderr)
         return None
     finally:
-        # Make sure to clean up the temporary file even if an error occurs
-        if os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-            except:
-                pass
+        # Make sure to clean up the temporary file even if an error occurs.
+        # Only OSError is ignored so Ctrl-C during cleanup still propagates.
+        try:
+            os.unlink(temp_file)
+        except OSError:
+            pass
 
-def analyze_context(context: str, verbose: bool = False) -> Optional[str]:
+class _LLMWorker:
+    """
+    In-process client for the llm library.
+    
+    The model is resolved once and reused, so repeated analyses in the same
+    process skip interpreter startup, plugin loading and client setup that
+    spawning the llm CLI pays on every call.
+    """
+    
+    def __init__(self):
+        self._model = None
+    
+    def _get_model(self):
+        if self._model is None:
+            self._model = llm.get_model(llm.get_default_model())
+        return self._model
+    
+    def query(self, prompt: str, context: str, schema: Optional[dict] = None) -> str:
+        """
+        Run a prompt against the default model.
+        
+        Args:
+            prompt: Instructions for the model
+            context: The extracted context, sent ahead of the prompt
+            schema: JSON schema to constrain the response to, if the model
+                supports schemas; otherwise it is left to the prompt
+            
+        Returns:
+            str: The model's response text
+        """
+        model = self._get_model()
+        kwargs = {}
+        if schema is not None and getattr(model, "supports_schema", False):
+            kwargs["schema"] = schema
+        # Same layout the CLI uses for piped input: stdin, then the prompt
+        response = model.prompt(f"{context}\n{prompt}", **kwargs)
+        return response.text()
+    
+    def stream(self, prompt: str, context: str) -> Iterator[str]:
+        """
+        Run a prompt against the default model, yielding text as it arrives.
+        
+        Args:
+            prompt: Instructions for the model
+            context: The extracted context, sent ahead of the prompt
+            
+        Yields:
+            str: Chunks of the model's response
+        """
+        yield from self._get_model().prompt(f"{context}\n{prompt}")
+
+_worker = _LLMWorker()
+
+def parse_analysis(raw: Union[str, bytes]) -> Optional[dict]:
+    """
+    Parse the LLM's JSON response.
+    
+    The response is parsed as-is first; only if that fails is it searched
+    for a fenced ```json block.
+    
+    Args:
+        raw: The model's response, as text or undecoded bytes
+        
+    Returns:
+        dict or None: Analysis with "project_summary" and "recommendations",
+        or None if the response is not usable JSON
+    """
+    try:
+        analysis = json.loads(raw)
+    except ValueError:
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8', 'replace')
+        match = JSON_FENCE_RE.search(raw)
+        if not match:
+            return None
+        try:
+            analysis = json.loads(match.group(1))
+        except ValueError:
+            return None
+    
+    if isinstance(analysis, dict):
+        analysis.setdefault("recommendations", [])
+    if not is_valid_analysis(analysis):
+        return None
+    return analysis
+
+def analyze_context(context: str, verbose: bool = False,
+                    prompt: str = ANALYSIS_PROMPT) -> Optional[dict]:
     """
     Analyze the extracted context using an LLM.
     
+    Uses the llm library in-process when it is importable, otherwise
+    falls back to analyze_context_via_cli().
+    
     Args:
         context: The extracted context as text
         verbose: Whether to show verbose output
+        prompt: Instructions for the model
         
     Returns:
-        str or None: Analysis results as text, or None if analysis failed
+        dict or None: Parsed analysis, or None if analysis failed
     """
-    temp_input_file = "temp_input.md"
+    if llm is None:
+        return analyze_context_via_cli(context, verbose, prompt)
+    
+    if verbose:
+        print("Running LLM analysis in-process")
+    
     try:
-        # Write the context to a temporary file for input
-        with open(temp_input_file, 'w', encoding='utf-8') as f:
-            f.write(context)
-            
-        prompt = 'Analyze this codebase and provide: 1) A project summary describing what the code does, 2) A list of recommendations for improvements.'
-        cmd = ["llm", "prompt", prompt]
-        
+        raw = _worker.query(prompt, context, schema=ANALYSIS_SCHEMA)
+    except Exception as e:
+        print(f"Error running LLM analysis: {e}", file=sys.stderr)
+        return None
+    
+    analysis = parse_analysis(raw)
+    if analysis is None:
+        print("Error: LLM did not return a valid JSON analysis", file=sys.stderr)
         if verbose:
-            print(f"Running: {' '.join(cmd)}")
-            
-        # Redirect the input file to the command
-        with open(temp_input_file, 'r', encoding='utf-8') as f:
+            print(f"Response: {raw}", file=sys.stderr)
+    return analysis
+
+def analyze_context_via_cli(context: str, verbose: bool = False,
+                            prompt: str = ANALYSIS_PROMPT) -> Optional[dict]:
+    """
+    Analyze the extracted context by running the llm CLI.
+    
+    The context is passed to llm over stdin, so it never touches the disk.
+    If the model (or llm release) does not support --schema, the prompt is
+    retried once without it and parse_analysis() copes with the result.
+    
+    Args:
+        context: The extracted context as text
+        verbose: Whether to show verbose output
+        prompt: Instructions for the model
+        
+    Returns:
+        dict or None: Parsed analysis, or None if analysis failed
+    """
+    cmd = ["llm", "prompt", "--schema", json.dumps(ANALYSIS_SCHEMA), prompt]
+    
+    if verbose:
+        print(f"Running: {' '.join(cmd)}")
+    
+    try:
+        # Binary pipes: json.loads takes stdout as bytes, stderr is only
+        # decoded if shown
+        try:
             result = subprocess.run(
                 cmd,
-                stdin=f,
+                input=context.encode('utf-8'),
+                capture_output=True,
+                check=True
+            )
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode('utf-8', 'replace').lower()
+            if "support schema" not in stderr and "--schema" not in stderr:
+                raise
+            cmd = ["llm", "prompt", prompt]
+            if verbose:
+                print("Model does not support schemas, retrying without --schema")
+                print(f"Running: {' '.join(cmd)}")
+            result = subprocess.run(
+                cmd,
+                input=context.encode('utf-8'),
                 capture_output=True,
-                text=True,
                 check=True
             )
-        
-        # Return the raw output
-        return result.stdout
     except subprocess.CalledProcessError as e:
         print(f"Error running LLM analysis: {e}", file=sys.stderr)
         if verbose:
-            print(f"stderr: {e.stderr}", file=sys.stderr)
+            print(f"stderr: {e.stderr.decode('utf-8', 'replace')}", file=sys.stderr)
         return None
     except FileNotFoundError:
         print("Error: 'llm' command not found. Please install it first.", file=sys.stderr)
         return None
-    except IOError as e:
-        print(f"Error with temporary file: {e}", file=sys.stderr)
-        return None
-    finally:
-        # Clean up the temporary file
-        if os.path.exists(temp_input_file):
-            try:
-                os.remove(temp_input_file)
-            except:
-                pass
+    
+    analysis = parse_analysis(result.stdout)
+    if analysis is None:
+        print("Error: LLM did not return a valid JSON analysis", file=sys.stderr)
+        if verbose:
+            print(f"Response: {result.stdout.decode('utf-8', 'replace')}", file=sys.stderr)
+    return analysis
 
-def format_report(directory: str, context: str, analysis: str) -> str:
+def stream_analysis(context: str, verbose: bool = False) -> Iterator[str]:
     """
-    Format the analysis results into a readable report.
+    Analyze the extracted context, yielding the LLM's free-text response
+    as it is generated.
+    
+    Uses the llm library in-process when it is importable, otherwise reads
+    the llm CLI's output line by line.
+    
+    Args:
+        context: The extracted context as text
+        verbose: Whether to show verbose output
+        
+    Yields:
+        str: Chunks of the analysis
+        
+    Raises:
+        subprocess.CalledProcessError: If the llm CLI exits with an error
+    """
+    if llm is not None:
+        if verbose:
+            print("Running LLM analysis in-process")
+        yield from _worker.stream(STREAM_PROMPT, context)
+        return
+    
+    cmd = ["llm", "prompt", STREAM_PROMPT]
+    
+    if verbose:
+        print(f"Running: {' '.join(cmd)}")
+    
+    with subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=None if verbose else subprocess.DEVNULL,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    ) as proc:
+        # llm reads all of stdin before it starts answering
+        try:
+            proc.stdin.write(context)
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        yield from proc.stdout
+    
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+@functools.lru_cache(maxsize=None)
+def project_name(directory: str) -> str:
+    """
+    Get the display name of a project directory.
     
     Args:
         directory: The analyzed directory path
-        context: The extracted context
-        analysis: The analysis results as text
         
     Returns:
-        str: Formatted report
+        str: Base name of the absolute path
+    """
+    return os.path.basename(os.path.abspath(directory))
+
+def iter_report_header(name: str, timestamp: str) -> Iterator[str]:
+    """
+    Format the report header.
+    
+    Args:
+        name: Project name, from project_name()
+        timestamp: Generation time to show in the header
+        
+    Yields:
+        str: Successive header lines, each ending in a newline
+    """
+    yield "=" * 80 + "\n"
+    yield f"PROJECT INSPECTOR REPORT - {name}\n"
+    yield f"Generated on: {timestamp}\n"
+    yield "=" * 80 + "\n"
+    yield "\n"
+
+def iter_report(name: str, timestamp: str, context: str, analysis: dict) -> Iterator[str]:
     """
-    report = []
+    Format the analysis results into a readable report.
     
-    # Header
-    report.append("=" * 80)
-    report.append(f"PROJECT INSPECTOR REPORT - {os.path.basename(os.path.abspath(directory))}")
-    report.append(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    report.append("=" * 80)
-    report.append("")
+    The report is produced line by line so it can be written out with
+    writelines() without first building the whole text in memory.
     
-    # LLM Analysis
-    report.append("LLM ANALYSIS")
-    report.append("-" * 80)
-    report.append(analysis)
+    Args:
+        name: Project name, from project_name()
+        timestamp: Generation time to show in the header
+        context: The extracted context
+        analysis: Parsed analysis from analyze_context()
+        
+    Yields:
+        str: Successive report lines, each ending in a newline
+    """
+    yield from iter_report_header(name, timestamp)
+    
+    # Summary
+    yield "PROJECT SUMMARY\n"
+    yield "-" * 80 + "\n"
+    yield analysis["project_summary"].rstrip("\n") + "\n"
+    yield "\n"
     
-    report.append("")
-    report.append("=" * 80)
+    # Recommendations
+    yield "RECOMMENDATIONS\n"
+    yield "-" * 80 + "\n"
+    for i, rec in enumerate(analysis["recommendations"], 1):
+        yield f"{i}. {rec}\n"
     
-    return "\n".join(report)
+    yield "\n"
+    yield "=" * 80 + "\n"
 
-def main():
-    """Main entry point for the script."""
-    args = parse_arguments()
+def inspect_one(directory: str, verbose: bool = False, use_cache: bool = True,
+                incremental: bool = False, trim: bool = True,
+                exclude: Tuple[str, ...] = ()) -> Optional[Tuple[str, dict]]:
+    """
+    Run the extraction and analysis pipeline for one directory.
     
-    # Check if directory exists
-    if not check_directory(args.directory):
-        sys.exit(1)
+    Args:
+        directory: Path to the project directory
+        verbose: Whether to show verbose output
+        use_cache: Whether to reuse a cached result for an unchanged directory
+        incremental: Whether to only analyze files changed since the last run
+        trim: Whether to trim the context sent to the LLM
+        exclude: Files to ignore when checking whether the directory changed
+        
+    Returns:
+        tuple or None: (context, analysis), or None if any step failed
+    """
+    print(f"Analyzing project in '{directory}'...")
     
-    print(f"Analyzing project in '{args.directory}'...")
+    # Reuse a previous result if the directory is unchanged
+    fingerprint = directory_fingerprint(directory, exclude)
+    key = cache_key(directory, fingerprint, trim)
+    cached = load_cache(key) if use_cache else None
+    
+    if cached:
+        if verbose:
+            print(f"Using cached result ({key[:12]})")
+        return cached["context"], cached["analysis"]
     
     # Extract context
-    context = extract_context(args.directory, args.verbose)
+    context = extract_context(directory, verbose, fingerprint)
     if not context:
-        sys.exit(1)
+        return None
     
     print("Context extraction complete.")
     
     # Analyze context
     print("Analyzing project structure...")
-    analysis = analyze_context(context, args.verbose)
+    analysis = trivial_analysis(context)
+    if analysis:
+        if verbose:
+            print("Project is trivial, skipping LLM analysis")
+    elif incremental:
+        analysis = analyze_incremental(directory, context, verbose, trim)
+    else:
+        analysis = analyze_context(_compress_context(context) if trim else context, verbose)
     if not analysis:
+        return None
+    
+    save_cache(key, context, analysis)
+    return context, analysis
+
+def stream_one(directory: str, out: TextIO, timestamp: str, verbose: bool = False,
+               use_cache: bool = True, trim: bool = True,
+               exclude: Tuple[str, ...] = ()) -> bool:
+    """
+    Inspect one directory, writing the report while the LLM generates it.
+    
+    A cached result is written as a normal report. Otherwise the LLM's
+    free-text analysis is copied to out chunk by chunk, so the first words
+    show up as soon as the model produces them. Streamed analyses are not
+    structured, so they are not cached.
+    
+    Args:
+        directory: Path to the project directory
+        out: Where to write the report
+        timestamp: Generation time to show in the header
+        verbose: Whether to show verbose output
+        use_cache: Whether to reuse a cached result for an unchanged directory
+        trim: Whether to trim the context sent to the LLM
+        exclude: Files to ignore when checking whether the directory changed
+        
+    Returns:
+        bool: True if the report was written in full
+    """
+    print(f"Analyzing project in '{directory}'...")
+    
+    # Keep the report apart from progress messages when both go to stdout
+    separator = "\n" if out is sys.stdout else ""
+    
+    fingerprint = directory_fingerprint(directory, exclude)
+    key = cache_key(directory, fingerprint, trim)
+    cached = load_cache(key) if use_cache else None
+    
+    if cached:
+        if verbose:
+            print(f"Using cached result ({key[:12]})")
+        out.write(separator)
+        out.writelines(iter_report(project_name(directory), timestamp,
+                                   cached["context"], cached["analysis"]))
+        return True
+    
+    context = extract_context(directory, verbose, fingerprint)
+    if not context:
+        return False
+    
+    print("Context extraction complete.")
+    print("Analyzing project structure...")
+    
+    analysis = trivial_analysis(context)
+    if analysis:
+        if verbose:
+            print("Project is trivial, skipping LLM analysis")
+        out.write(separator)
+        out.writelines(iter_report(project_name(directory), timestamp, context, analysis))
+        return True
+    
+    out.write(separator)
+    out.writelines(iter_report_header(project_name(directory), timestamp))
+    out.write("LLM ANALYSIS\n")
+    out.write("-" * 80 + "\n")
+    out.flush()
+    
+    try:
+        for chunk in stream_analysis(_compress_context(context) if trim else context, verbose):
+            out.write(chunk)
+            out.flush()
+    except FileNotFoundError:
+        print("Error: 'llm' command not found. Please install it first.", file=sys.stderr)
+        return False
+    except Exception as e:
+        print(f"Error running LLM analysis: {e}", file=sys.stderr)
+        return False
+    
+    out.write("\n\n")
+    out.write("=" * 80 + "\n")
+    return True
+
+async def main_many(directories: List[str], verbose: bool = False, use_cache: bool = True,
+                    incremental: bool = False, trim: bool = True,
+                    exclude: Tuple[str, ...] = ()) -> List[Optional[Tuple[str, dict]]]:
+    """
+    Inspect several directories concurrently.
+    
+    Each pipeline spends nearly all of its time waiting on repomix and the
+    LLM, so pipelines run in worker threads with the number in flight
+    bounded by a semaphore sized to the CPU count.
+    
+    Args:
+        directories: Paths to the project directories
+        verbose: Whether to show verbose output
+        use_cache: Whether to reuse cached results for unchanged directories
+        incremental: Whether to only analyze files changed since the last run
+        trim: Whether to trim the context sent to the LLM
+        exclude: Files to ignore when checking whether a directory changed
+        
+    Returns:
+        list: One inspect_one() result per directory, in input order
+    """
+    sem = asyncio.Semaphore(min(len(directories), os.cpu_count() or 1))
+    
+    async def run(directory: str) -> Optional[Tuple[str, dict]]:
+        async with sem:
+            return await asyncio.to_thread(
+                inspect_one, directory, verbose, use_cache, incremental, trim, exclude
+            )
+    
+    return await asyncio.gather(*(run(d) for d in directories))
+
+def _init_pool_worker() -> None:
+    """Keep pool workers, and anything they run, from oversubscribing cores."""
+    os.environ["OMP_NUM_THREADS"] = "1"
+
+def inspect_many(directories: List[str], verbose: bool = False, use_cache: bool = True,
+                 incremental: bool = False, trim: bool = True,
+                 exclude: Tuple[str, ...] = (),
+                 n_workers: Optional[int] = None) -> List[Optional[Tuple[str, dict]]]:
+    """
+    Inspect several directories in a process pool.
+    
+    Unlike main_many(), the Python-side work (hashing, trimming, and the
+    in-process llm client) runs in parallel rather than under one GIL.
+    
+    Args:
+        directories: Paths to the project directories
+        verbose: Whether to show verbose output
+        use_cache: Whether to reuse cached results for unchanged directories
+        incremental: Whether to only analyze files changed since the last run
+        trim: Whether to trim the context sent to the LLM
+        exclude: Files to ignore when checking whether a directory changed
+        n_workers: Number of worker processes (default: one per CPU, capped
+            at the number of directories)
+        
+    Returns:
+        list: One inspect_one() result per directory, in input order
+    """
+    if n_workers is None:
+        n_workers = min(len(directories), os.cpu_count() or 4)
+    
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_pool_worker) as ex:
+        return list(ex.map(
+            inspect_one, directories,
+            repeat(verbose), repeat(use_cache), repeat(incremental), repeat(trim),
+            repeat(exclude)
+        ))
+
+def main():
+    """Main entry point for the script."""
+    args = parse_arguments()
+    
+    # Check if directories exist
+    if not all([check_directory(d) for d in args.directories]):
         sys.exit(1)
     
-    # Format and output report
-    report = format_report(args.directory, context, analysis)
+    use_cache = not args.no_cache
+    trim = not args.no_trim
+    # A report written into a project must not make its next run a cache miss
+    exclude = (os.path.abspath(args.output),) if args.output else ()
+    
+    if args.stream:
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if args.output:
+            try:
+                with open(args.output, 'w') as f:
+                    ok = stream_one(args.directories[0], f, timestamp, args.verbose,
+                                    use_cache, trim, exclude)
+            except IOError as e:
+                print(f"Error writing to output file: {e}", file=sys.stderr)
+                sys.exit(1)
+            if ok:
+                print(f"Report saved to '{args.output}'")
+        else:
+            ok = stream_one(args.directories[0], sys.stdout, timestamp, args.verbose,
+                            use_cache, trim, exclude)
+        
+        if not ok:
+            sys.exit(1)
+        print("Analysis complete!")
+        return
+    
+    if len(args.directories) == 1:
+        results = [inspect_one(args.directories[0], args.verbose, use_cache,
+                               args.incremental, trim, exclude)]
+    elif args.processes:
+        results = inspect_many(args.directories, args.verbose, use_cache,
+                               args.incremental, trim, exclude)
+    else:
+        results = asyncio.run(main_many(args.directories, args.verbose, use_cache,
+                                        args.incremental, trim, exclude))
+    
+    # Report on every directory that succeeded
+    succeeded = [
+        (directory, result)
+        for directory, result in zip(args.directories, results)
+        if result
+    ]
+    if not succeeded:
+        sys.exit(1)
+    failed = len(succeeded) < len(results)
+    
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    def write_reports(out: TextIO) -> None:
+        for i, (directory, (context, analysis)) in enumerate(succeeded):
+            if i:
+                out.write("\n")
+            out.writelines(iter_report(project_name(directory), timestamp, context, analysis))
     
     if args.output:
         try:
             with open(args.output, 'w') as f:
-                f.write(report)
+                write_reports(f)
             print(f"Report saved to '{args.output}'")
         except IOError as e:
             print(f"Error writing to output file: {e}", file=sys.stderr)
             sys.exit(1)
     else:
-        print("\n" + report)
+        print()
+        write_reports(sys.stdout)
+    
+    if failed:
+        sys.exit(1)
     
     print("Analysis complete!")
 